@@ -0,0 +1,143 @@
+#!/bin/python
+import xarray as xr
+import numpy as np
+import logging
+import argparse
+import tempfile
+import glob
+import time
+import sys
+import os
+from nc_encoding import write_netcdf
+
+
+def benchmark(args):
+    '''
+    Compare write time, read time and file size of the default xarray output
+    against the compact output encoding. Uses existing output files (e.g., of
+    read_temis.py or calc_omiscal.py) if given, otherwise synthetic daily
+    fields with the structure of the real output (see _make_synthetic).
+    '''
+    log = logging.getLogger(__name__)
+    # start all writers from datasets without per-variable encoding, so that
+    # the on-disk encoding of the input files cannot leak into the results
+    datasets = [_clear_encoding(ds) for ds in _get_input(args)]
+    log.info('Input: {}'.format(args.ifiles if args.ifiles is not None else 'synthetic fields based on {}'.format(args.template)))
+    log.info('Number of files: {}'.format(len(datasets)))
+    for v in datasets[0].data_vars:
+        vals = np.concatenate([d[v].values.ravel() for d in datasets])
+        log.info('{}: dtype={}, min={:.4g}, max={:.4g}, mean={:.4g}, zeros={:.1f}%, mode fraction={:.1f}%'.format(
+              v,vals.dtype,np.nanmin(vals),np.nanmax(vals),np.nanmean(vals),100.0*np.mean(vals==0.0),100.0*_mode_fraction(vals)))
+    writers = {
+        'default': lambda d,f: d.to_netcdf(f),
+        'compact': lambda d,f: write_netcdf(d,f,pack=False),
+        'packed':  lambda d,f: write_netcdf(d,f,pack=True),
+    }
+    log.info('{:10s} {:>12s} {:>12s} {:>12s} {:>12s}'.format('encoding','write [s]','read [s]','size [kB]','max abs err'))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name,writer in writers.items():
+            ofiles = [os.path.join(tmpdir,'{}_{:04d}.nc'.format(name,i)) for i in range(len(datasets))]
+            t0 = time.time()
+            for ds,ofile in zip(datasets,ofiles):
+                writer(ds,ofile)
+            twrite = time.time() - t0
+            t0 = time.time()
+            rds = [_load(f) for f in ofiles]
+            tread = time.time() - t0
+            size = np.sum([os.path.getsize(f) for f in ofiles]) / 1024.0
+            err = np.max([np.nanmax(np.abs(rd[v].values-ds[v].values)) for rd,ds in zip(rds,datasets) for v in ds.data_vars])
+            log.info('{:10s} {:12.3f} {:12.3f} {:12.1f} {:12.2e}'.format(name,twrite,tread,size,err))
+            log.debug('{} files written to and read from {}'.format(name,tmpdir))
+    return
+
+
+def _get_input(args):
+    '''
+    Read the input files, or create synthetic ones if no files are given.
+    '''
+    if args.ifiles is not None:
+        ifiles = sorted(glob.glob(args.ifiles))
+        if len(ifiles) == 0:
+            raise ValueError('No files found: {}'.format(args.ifiles))
+        return [_load(f) for f in ifiles]
+    ds = _load(args.template)
+    rng = np.random.default_rng(0)
+    return [_make_synthetic(ds,rng,args) for i in range(args.nfiles)]
+
+
+def _load(ifile):
+    '''
+    Read ifile into memory and close it.
+    '''
+    with xr.open_dataset(ifile) as ds:
+        return ds.load()
+
+
+def _clear_encoding(ds):
+    '''
+    Return a copy of ds with the encoding of all variables removed. The
+    dataset encoding (unlimited dimensions) is kept. Float data variables
+    are cast to float32, the dtype of the templates: packed input files
+    decode to float64, which would inflate the default output.
+    '''
+    ds = ds.copy()
+    for v in ds.data_vars:
+        if np.issubdtype(ds[v].dtype,np.floating):
+            ds[v] = ds[v].astype('float32')
+    for v in ds.variables:
+        ds.variables[v].encoding = {}
+    return ds
+
+
+def _make_synthetic(ds,rng,args):
+    '''
+    Fill the data variables of ds with values that look like the real output:
+    TroposphericNO2 is zero where no valid retrieval was mapped onto a cell
+    and has a smooth background plus a few hotspots elsewhere; scal is 1.0
+    wherever no scale factor could be computed and is clipped to
+    minval/maxval elsewhere.
+    '''
+    ds = ds.copy(deep=True)
+    shape = ds[list(ds.data_vars)[0]].shape
+    lats = ds.lat.values[:,None] * np.ones(shape[-2:])
+    valid = rng.uniform(size=shape) < args.valid_fraction
+    for v in ds.data_vars:
+        if v == 'scal':
+            arr = np.ones(shape)
+            ratio = rng.normal(1.0,0.4,size=shape)
+            active = valid & (rng.uniform(size=shape) < 0.5)
+            arr[active] = np.clip(ratio[active],args.minval,args.maxval)
+        else:
+            background = 1.0e15 * np.exp(-(lats/40.0)**2) * rng.lognormal(0.0,0.3,size=shape)
+            hotspots = (rng.uniform(size=shape) < 0.02) * rng.lognormal(np.log(5.0e15),0.5,size=shape)
+            arr = np.where(valid,background+hotspots,0.0)
+        ds[v].values[:] = arr.astype(ds[v].dtype)
+    return ds
+
+
+def _mode_fraction(vals):
+    '''
+    Fraction of values equal to the most frequent value.
+    '''
+    _,counts = np.unique(vals[~np.isnan(vals)],return_counts=True)
+    return np.max(counts) / float(vals.size) if counts.size > 0 else 0.0
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Benchmark NetCDF output encodings')
+    p.add_argument('-i', '--ifiles',type=str,help='existing output files to benchmark (glob pattern); synthetic fields are used if not set',default=None)
+    p.add_argument('-t', '--template',type=str,help='template file for synthetic fields',default=os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','omiscal','templates','omiscal_template_5x5.nc'))
+    p.add_argument('-n', '--nfiles',type=int,help='number of synthetic files',default=30)
+    p.add_argument('-vf', '--valid_fraction',type=float,help='fraction of cells with valid observations in synthetic fields',default=0.5)
+    p.add_argument('-mn', '--minval',type=float,help='minimum scale value in synthetic fields',default=0.1)
+    p.add_argument('-mx', '--maxval',type=float,help='maximum scale value in synthetic fields',default=1.5)
+    return p.parse_args()
+
+
+if __name__ == '__main__':
+    log = logging.getLogger()
+    log.setLevel(logging.INFO)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.INFO)
+    log.addHandler(handler)
+    benchmark(parse_args())
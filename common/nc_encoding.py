@@ -0,0 +1,104 @@
+#!/bin/python
+import numpy as np
+import logging
+
+
+# per-variable output encoding. Fields not listed here are written as float32.
+# scal is bounded by calc_omiscal's minval/maxval (0.1-1.5 by default), so it
+# is normally packed into int16 with a resolution of 1.0e-4. If the data does
+# not fit (e.g., a larger --maxval), scale_factor/add_offset are recomputed
+# from the data range, see _get_packing. Float fields use a NaN fill value
+# (as xarray does by default): any finite fill value such as 1.0e15 would fall
+# into the physical range of the NO2 columns (molec.cm-2) and mask real data.
+VAR_ENCODING = {
+    'TroposphericNO2': {'dtype':'float32', '_FillValue':np.float32(np.nan)},
+    'scal':            {'dtype':'int16', 'scale_factor':1.0e-4, 'add_offset':0.0, '_FillValue':np.int16(-32767)},
+}
+DEFAULT_ENCODING = {'dtype':'float32', '_FillValue':np.float32(np.nan)}
+COMPRESSION = {'zlib':True, 'shuffle':True, 'complevel':4}
+# coordinate encoding entries carried over from the input (template) file
+COORD_ENCODING_KEYS = ['dtype','units','calendar']
+
+
+def get_encoding(ds,pack=True,complevel=COMPRESSION['complevel']):
+    '''
+    Return the to_netcdf encoding for all variables of dataset ds. Data
+    variables are written as float32 (or packed int16 if pack is True and
+    the variable allows it) and compressed, which requires a chunked layout
+    (see _get_chunksizes). Coordinates keep their (template) dtype, units and calendar and
+    get no fill value, as expected by cdo and ExtData.
+    '''
+    encoding = {}
+    for v in ds.coords:
+        encoding[v] = {k:ds[v].encoding[k] for k in COORD_ENCODING_KEYS if k in ds[v].encoding}
+        encoding[v]['_FillValue'] = None
+    for v in ds.data_vars:
+        enc = dict(VAR_ENCODING.get(v,DEFAULT_ENCODING))
+        if not pack and enc['dtype'] != 'float32':
+            enc = dict(DEFAULT_ENCODING)
+        if 'scale_factor' in enc:
+            enc = _get_packing(ds[v],enc)
+        if not np.issubdtype(ds[v].dtype,np.floating):
+            enc = {}
+        enc.update(COMPRESSION)
+        enc['complevel'] = complevel
+        enc['contiguous'] = False
+        enc['chunksizes'] = _get_chunksizes(ds[v])
+        encoding[v] = enc
+    return encoding
+
+
+def write_netcdf(ds,ofile,pack=True,complevel=COMPRESSION['complevel']):
+    '''
+    Write dataset ds to ofile using the compact output encoding.
+    '''
+    log = logging.getLogger(__name__)
+    encoding = get_encoding(ds,pack=pack,complevel=complevel)
+    unlimited_dims = ds.encoding.get('unlimited_dims',None)
+    ds.to_netcdf(ofile,format='NETCDF4',encoding=encoding,unlimited_dims=unlimited_dims)
+    log.debug('Wrote {} with encoding {}'.format(ofile,encoding))
+    return
+
+
+def _get_packing(da,enc):
+    '''
+    Check that the values of da fit into the packed integer encoding enc.
+    If not, recompute scale_factor and add_offset from the data's min/max so
+    that the full range maps onto the valid integer range (the fill value
+    excluded). Falls back to float32 if the data has no finite values.
+    '''
+    log = logging.getLogger(__name__)
+    vals = da.values[np.isfinite(da.values)]
+    if vals.size == 0:
+        return dict(DEFAULT_ENCODING)
+    vmin = float(vals.min())
+    vmax = float(vals.max())
+    info = np.iinfo(enc['dtype'])
+    # exclude the fill value (and everything beyond it) from the valid range
+    fill = int(enc['_FillValue'])
+    imin = max(info.min,fill+1) if fill < 0 else info.min
+    imax = min(info.max,fill-1) if fill > 0 else info.max
+    pmin = np.round((vmin-enc['add_offset'])/enc['scale_factor'])
+    pmax = np.round((vmax-enc['add_offset'])/enc['scale_factor'])
+    if pmin >= imin and pmax <= imax:
+        return enc
+    enc = dict(enc)
+    enc['add_offset'] = 0.5*(vmax+vmin)
+    # keep one step away from the limits so that rounding cannot hit the fill value
+    nmax = min(-imin,imax) - 1
+    enc['scale_factor'] = (vmax-vmin)/(2.0*nmax) if vmax > vmin else 1.0
+    log.warning('{} range [{}, {}] does not fit default packing - use scale_factor={}, add_offset={}'.format(da.name,vmin,vmax,enc['scale_factor'],enc['add_offset']))
+    return enc
+
+
+def _get_chunksizes(da):
+    '''
+    Chunk shape for a data array: one time step, full spatial extent.
+    HDF5 only compresses chunked variables. The daily output files hold a
+    single time step on a small global grid, so this is one chunk per
+    variable: every read decompresses the whole field at once, and reading
+    a time series means opening one file (one chunk) per day. Chunking does
+    not speed up time-series access here, only the smaller files do. For
+    files with several time steps, each step stays independently readable.
+    '''
+    return tuple([1 if d=='time' else n for d,n in zip(da.dims,da.shape)])
@@ -0,0 +1,107 @@
+import xarray as xr
+import numpy as np
+import datetime as dt
+import pytest
+import os
+from nc_encoding import get_encoding, write_netcdf
+
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','omiscal','templates','omiscal_template_5x5.nc')
+
+
+def _make_dataset(para='scal',vals=None):
+    lats = np.arange(-87.5,90.,5.0,dtype='float32')
+    lons = np.arange(-177.5,180.,5.0,dtype='float32')
+    arr = np.ones((1,lats.size,lons.size),dtype='float32')
+    if vals is not None:
+        arr.flat[:len(vals)] = vals
+    ds = xr.Dataset({para:(('time','lat','lon'),arr)},coords={'time':[dt.datetime(2020,1,1)],'lat':lats,'lon':lons})
+    return ds
+
+
+@pytest.mark.parametrize('vals',[[0.1,1.5],[-3.2766,3.2767],[-3.2767,1.0],[3.3,4.0],[-10.0,0.1,250.0]])
+def test_packed_roundtrip(tmp_path,vals):
+    ds = _make_dataset(vals=vals)
+    ofile = str(tmp_path/'scal.nc')
+    write_netcdf(ds,ofile,pack=True)
+    rd = xr.open_dataset(ofile)
+    assert rd.scal.encoding['dtype'] == np.dtype('int16')
+    tol = 0.5*rd.scal.encoding['scale_factor'] + 1.0e-6*np.max(np.abs(vals))
+    assert not np.any(np.isnan(rd.scal.values))
+    np.testing.assert_allclose(rd.scal.values,ds.scal.values,rtol=0.0,atol=tol)
+
+
+def test_coord_encoding_preserved(tmp_path):
+    ds = xr.open_dataset(TEMPLATE)
+    tenc = ds.time.encoding
+    ds = ds.assign_coords(time=[dt.datetime(2021,3,4)])
+    ds.time.encoding = tenc
+    # reference: previous output written with xarray defaults
+    ds.to_netcdf(str(tmp_path/'default.nc'))
+    write_netcdf(ds,str(tmp_path/'compact.nc'))
+    ref = xr.open_dataset(str(tmp_path/'default.nc'),decode_times=False)
+    rd = xr.open_dataset(str(tmp_path/'compact.nc'),decode_times=False)
+    for v in ['time','lat','lon']:
+        assert rd[v].dtype == ref[v].dtype
+        assert rd[v].attrs.get('units') == ref[v].attrs.get('units')
+        assert rd[v].attrs.get('calendar') == ref[v].attrs.get('calendar')
+        assert '_FillValue' not in rd[v].attrs
+    assert rd.time.attrs['units'] == 'days since 2017-01-01'
+    assert rd.time.attrs['calendar'] == 'standard'
+    assert rd.time.values[0] == ref.time.values[0]
+
+
+def test_no2_fill_value(tmp_path):
+    ds = _make_dataset(para='TroposphericNO2',vals=[0.0,1.0e15,2.5e15])
+    ofile = str(tmp_path/'no2.nc')
+    write_netcdf(ds,ofile)
+    rd = xr.open_dataset(ofile)
+    assert rd.TroposphericNO2.encoding['dtype'] == np.dtype('float32')
+    assert np.isnan(rd.TroposphericNO2.encoding['_FillValue'])
+    np.testing.assert_array_equal(rd.TroposphericNO2.values,ds.TroposphericNO2.values)
+
+
+def test_get_encoding_pack():
+    ds = _make_dataset()
+    enc = get_encoding(ds,pack=True)
+    assert enc['scal']['dtype'] == 'int16'
+    assert enc['scal']['scale_factor'] == 1.0e-4
+    assert enc['scal']['add_offset'] == 0.0
+    assert enc['scal']['zlib'] and enc['scal']['shuffle']
+    assert enc['scal']['chunksizes'] == (1,36,72)
+    for v in ['time','lat','lon']:
+        assert enc[v]['_FillValue'] is None
+
+
+def test_get_encoding_nopack(tmp_path):
+    ds = _make_dataset(vals=[0.1,1.5])
+    enc = get_encoding(ds,pack=False)
+    assert enc['scal']['dtype'] == 'float32'
+    assert 'scale_factor' not in enc['scal']
+    ofile = str(tmp_path/'scal.nc')
+    write_netcdf(ds,ofile,pack=False)
+    rd = xr.open_dataset(ofile)
+    assert rd.scal.encoding['dtype'] == np.dtype('float32')
+    np.testing.assert_array_equal(rd.scal.values,ds.scal.values)
+
+
+def test_get_encoding_overflow():
+    ds = _make_dataset(vals=[3.3,4.0])
+    enc = get_encoding(ds,pack=True)
+    assert enc['scal']['dtype'] == 'int16'
+    assert (4.0-enc['scal']['add_offset'])/enc['scal']['scale_factor'] < 32767
+    assert (1.0-enc['scal']['add_offset'])/enc['scal']['scale_factor'] > -32767
+
+
+def test_integer_variable(tmp_path):
+    ds = _make_dataset()
+    ds['count'] = (('time','lat','lon'),np.arange(36*72,dtype='int32').reshape(1,36,72))
+    enc = get_encoding(ds)
+    assert 'dtype' not in enc['count']
+    assert '_FillValue' not in enc['count']
+    assert enc['count']['zlib']
+    ofile = str(tmp_path/'count.nc')
+    write_netcdf(ds,ofile)
+    rd = xr.open_dataset(ofile)
+    assert rd['count'].dtype == np.dtype('int32')
+    np.testing.assert_array_equal(rd['count'].values,ds['count'].values)
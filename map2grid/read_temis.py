@@ -6,6 +6,9 @@ import logging
 import glob
 import argparse
 import sys
+import os
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','common'))
+from nc_encoding import write_netcdf
 
 
 def read_temis(args):
@@ -29,7 +32,7 @@ def read_temis(args):
     do.attrs['Author'] = 'read_temis.py (written by Christoph Keller)' 
     do['time'].values = [anadate]
     ofile = anadate.strftime(args.ofile)
-    do.to_netcdf(ofile)
+    write_netcdf(do,ofile)
     log.info('OMI NO2 data written to {}'.format(ofile))
     return
  
@@ -8,6 +8,8 @@ import argparse
 import sys
 import os
 from calendar import monthrange
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','common'))
+from nc_encoding import write_netcdf
 
 
 def get_omiscal(args):
@@ -33,7 +35,7 @@ def get_omiscal(args):
     do.attrs['Author'] = 'calc_omiscal.py (written by Christoph Keller)' 
     do['time'].values = [anadate]
     ofile = anadate.strftime(args.ofile.replace('$res',args.res))
-    do.to_netcdf(ofile)
+    write_netcdf(do,ofile,pack=(args.pack==1))
     log.info('OMI scale factor written to {}'.format(ofile))
     # make a quick plot
     if args.plot==1:
@@ -189,6 +191,7 @@ def parse_args():
     p.add_argument('-ny', '--nyears',type=int,help='number of previous years to include',default=1)
     p.add_argument('-ry', '--refyear',type=int,help='reference year for normalization',default=2017)
     p.add_argument('-p', '--plot',type=int,help='make plot',default=1)
+    p.add_argument('-pk', '--pack',type=int,help='pack output into int16 where supported',default=1)
     return p.parse_args()    
 
 